@@ -2,8 +2,44 @@ import re
 import os
 import sys
 
+# 匹配替换字符串中的分组引用，如 \1、\g<name>
+GROUP_REF_RE = re.compile(r'\\(?:\d|g<)')
+# 匹配正则中的内联标志，如 (?i)、(?-s:...)；合并后在旧版Python上会作用于所有规则
+INLINE_FLAG_RE = re.compile(r'\(\?[aiLmsux-]')
 
-def replace_in_md(input_file, output_file, replacements):
+
+def combine_rules(compiled_rules):
+    """
+    将多条替换规则合并为一个正则，使替换只需扫描一遍文本。
+
+    Args:
+        compiled_rules (list of tuples): 预编译的规则列表，每个元素是 (regex, replacement) 元组。
+
+    Returns:
+        (combined, literals)：合并后的正则和每条规则展开转义后的替换文本；
+        规则少于两条、含分组、分组引用或内联标志、或合并编译失败时返回 None。
+    """
+    if len(compiled_rules) < 2:
+        return None
+    for regex, replacement in compiled_rules:
+        if regex.groups or GROUP_REF_RE.search(replacement) or INLINE_FLAG_RE.search(regex.pattern):
+            return None
+
+    try:
+        combined = re.compile(
+            '|'.join(f'(?P<r{i}>{regex.pattern})' for i, (regex, _) in enumerate(compiled_rules)),
+            re.MULTILINE | re.DOTALL,
+        )
+    except re.error:
+        return None
+
+    # 预先展开替换字符串中的转义（如 \n），替换时直接使用纯文本
+    empty_match = re.match('', '')
+    literals = [empty_match.expand(replacement) for _, replacement in compiled_rules]
+    return combined, literals
+
+
+def replace_in_md(input_file, output_file, replacements, single_pass=False):
     """
     读取 Markdown 文件，应用正则表达式替换，并保存到新文件。
 
@@ -11,6 +47,9 @@ def replace_in_md(input_file, output_file, replacements):
         input_file (str): 输入的 Markdown 文件路径。
         output_file (str): 输出的 Markdown 文件路径。
         replacements (list of tuples): 替换规则列表，每个元素是 (pattern, replacement) 元组。
+        single_pass (bool): 是否把所有规则合并后只扫描一遍文本，默认逐条替换。合并后每条规则都匹配原始文本，
+            前面规则的替换结果不会再被后面的规则匹配；多条规则的匹配相互重叠时，文本中位置靠前的匹配优先，
+            同一位置才按规则顺序。因此只适用于互不重叠的规则；规则无法合并时自动逐条替换。
     """
 
     # 检查输入文件是否存在
@@ -24,19 +63,40 @@ def replace_in_md(input_file, output_file, replacements):
             content = f.read()
         print(f"成功读取文件：{input_file}")
 
+        # 预编译所有替换规则
+        # re.MULTILINE 使 ^ 和 $ 匹配每行的开始和结束
+        # re.DOTALL 使 . 匹配包括换行符在内的所有字符
+        compiled_rules = [
+            (re.compile(pattern, re.MULTILINE | re.DOTALL), replacement)
+            for pattern, replacement in replacements
+        ]
+
         # 应用所有替换规则
-        modified_content = content
-        for pattern, replacement in replacements:
-            # 使用 re.sub 进行正则替换
-            # re.MULTILINE 使 ^ 和 $ 匹配每行的开始和结束
-            # re.DOTALL 使 . 匹配包括换行符在内的所有字符
-            modified_content, count = re.subn(pattern, replacement, modified_content, flags=re.MULTILINE | re.DOTALL)
-            if count > 0:
-                print(f"已替换 '{pattern}' -> '{replacement}'，共 {count} 处。")
-
-        # 写入输出文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(modified_content)
+        combined = combine_rules(compiled_rules) if single_pass else None
+        if combined:
+            # 合并后的正则只扫描一遍，按命中的分组名分派到对应规则
+            regex, literals = combined
+            counts = [0] * len(compiled_rules)
+
+            def dispatch(match):
+                index = int(match.lastgroup[1:])
+                counts[index] += 1
+                return literals[index]
+
+            modified_content = regex.sub(dispatch, content)
+            for (rule, replacement), count in zip(compiled_rules, counts):
+                if count > 0:
+                    print(f"已替换 '{rule.pattern}' -> '{replacement}'，共 {count} 处。")
+        else:
+            modified_content = content
+            for regex, replacement in compiled_rules:
+                modified_content, count = regex.subn(replacement, modified_content)
+                if count > 0:
+                    print(f"已替换 '{regex.pattern}' -> '{replacement}'，共 {count} 处。")
+
+        # 写入输出文件（一次编码为UTF-8后以二进制写入，不做换行符转换）
+        with open(output_file, 'wb') as f:
+            f.write(modified_content.encode('utf-8'))
         print(f"修改后的内容已保存到：{output_file}")
 
     except Exception as e:
@@ -6,82 +6,329 @@
 
 import argparse
 import hashlib
+import json
 import os
 import re
+import shutil
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import cached_property, lru_cache
+from html import unescape
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urldefrag, urljoin, urlparse
 
 import html2text
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, Comment, SoupStrainer
+
+# 优先使用C实现的lxml解析器，未安装时回退到内置的html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# 微信公众号文章的各组成部分：整篇文章区域，或其中的封面图、标题、作者行和正文容器。
+# 只解析这些部分可跳过导航、脚本等无关节点
+WECHAT_CONTENT = SoupStrainer(id=('page-content', 'js_cover', 'activity-name', 'meta_content', 'js_content'))
+TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+# 微信文章的<title>为空，标题在og:title中
+OG_TITLE_RE = re.compile(r'<meta\s+property="og:title"\s+content="([^"]*)"', re.IGNORECASE)
+# 主要内容区域的候选选择器，按优先级分为两组，每组合并为一个选择器只需遍历一次文档：
+# 先找结构化标签，再找常见的正文容器
+MAIN_SELECTORS = (
+    'main, article, [role="main"]',
+    '.content, #content, .post, .entry-content',
+)
+
+# 清理HTML时移除的标签
+REMOVABLE_TAGS = {'script', 'style', 'meta', 'link'}
+
+# Markdown后处理用到的正则：标题连同其前后的换行，或三个以上的连续换行。
+# 井号后的空白不能跨行，否则标题会吞掉后面的行
+POST_PROCESS_RE = re.compile(r'\n*(\#{1,6}[^\S\n]+[^\n]+)\n*|\n{3,}')
+# 文件名中不允许出现的字符统一替换为下划线
+FILENAME_TRANS = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+
+# URL解析结果缓存：同一批图片通常来自同一网页和同一CDN主机，两者都是纯函数
+cached_urljoin = lru_cache(maxsize=512)(urljoin)
+cached_urlparse = lru_cache(maxsize=512)(urlparse)
+
+# 批量转换时的并发网页数
+BATCH_WORKERS = 8
+# 单个网页内并发下载的图片数
+IMAGE_WORKERS = 8
+# 图片流式写入磁盘时的分块大小
+COPY_CHUNK_SIZE = 256 * 1024
+
+# 元信息中的日期格式
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+PRINT_LOCK = threading.Lock()
+
+
+def log(message):
+    """线程安全地输出进度信息"""
+    with PRINT_LOCK:
+        print(message)
+
+
+def create_session():
+    """创建带连接池的requests会话"""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    })
+    # 连接池按最大并发请求数配置，让并发下载复用keep-alive连接；
+    # 服务器偶发的网关错误自动退避重试
+    retries = Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=BATCH_WORKERS * IMAGE_WORKERS,
+                          max_retries=retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def cache_validators(response):
+    """取出响应中用于条件请求的ETag和Last-Modified"""
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+
+def conditional_headers(validators):
+    """根据记录的ETag/Last-Modified生成条件请求头"""
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
 
 
 class WebpageToMarkdown:
-    def __init__(self, url, output_dir="output", filename=None):
+    # 已下载图片的缓存（图片URL -> 本地文件），在所有网页间共享
+    _url_cache = {}
+    # 本次运行下载的图片的ETag/Last-Modified（图片URL -> 缓存信息），复制图片时一并记录
+    _url_validators = {}
+    # 已创建过的目录，避免每次构造都重复调用mkdir
+    _dirs_created = set()
+    # 所有转换默认共享的会话，第一次使用时创建
+    _session = None
+    _session_lock = threading.Lock()
+
+    def __init__(self, url, output_dir="output", filename=None, session=None, timestamp=None,
+                 download_images=True, force=False, image_workers=IMAGE_WORKERS):
         self.url = url
         self.output_dir = Path(output_dir)
         self.images_dir = self.output_dir / "images"
+        self.meta_file = self.output_dir / ".meta.json"  # 记录每个网页的输出文件和ETag等缓存信息
+        self.image_meta_file = self.images_dir / ".etags.json"  # 记录每张图片的ETag等缓存信息
         self.filename = filename
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-
-        # 创建输出目录
-        self.output_dir.mkdir(exist_ok=True)
-        self.images_dir.mkdir(exist_ok=True)
-
-        # 配置html2text
-        self.h = html2text.HTML2Text()
-        self.h.ignore_links = False
-        self.h.ignore_images = False
-        self.h.ignore_emphasis = False
-        self.h.body_width = 0  # 不自动换行
-        self.h.protect_links = True
-        self.h.unicode_snob = True  # 使用unicode字符
+        self.download_images = download_images
+        self.image_workers = image_workers  # 同时下载的图片数上限
+        # 为True时即使已转换过也重新检查网页是否更新；网页有更新重新转换时，已下载的图片也用条件请求检查。
+        # 网页未修改（304）或未指定force而跳过时，不会请求其中的图片
+        self.force = force
+        self.session = session or self.shared_session()
+        self.timestamp = timestamp  # 元信息中的日期，批量转换时共用同一时间
+        self._image_meta_lock = threading.Lock()  # 并发下载图片时保护image_meta
+        self._image_meta_changed = False
+
+        # 创建输出目录，图片目录在第一次保存图片时才创建
+        self.ensure_dir(self.output_dir)
+
+    @cached_property
+    def h(self):
+        """html2text转换器，首次使用时才创建，跳过的网页不会创建"""
+        # 转换器带有每篇文档的解析状态，不能在并发的转换之间共享
+        h = html2text.HTML2Text()
+        h.ignore_links = False
+        h.ignore_images = not self.download_images
+        h.ignore_emphasis = False
+        h.body_width = 0  # 不自动换行
+        h.protect_links = True
+        h.unicode_snob = True  # 使用unicode字符
+        return h
+
+    @cached_property
+    def image_meta(self):
+        """图片目录下记录的图片缓存信息，首次使用时读取，没有时为空字典"""
+        try:
+            with open(self.image_meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def shared_session(cls):
+        """返回所有转换共享的会话，批量运行时复用到同一主机的连接"""
+        with cls._session_lock:
+            if cls._session is None:
+                cls._session = create_session()
+        return cls._session
+
+    def ensure_dir(self, path):
+        """创建目录，同一目录只调用一次mkdir"""
+        if path not in self._dirs_created:
+            path.mkdir(exist_ok=True)
+            self._dirs_created.add(path)
+
+    def load_page_meta(self):
+        """读取输出目录下记录的网页缓存信息，没有时返回空字典"""
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_page_meta(self, response, output_file):
+        """记录本网页的输出文件名、转换选项和ETag/Last-Modified，供下次运行判断是否需要重新获取"""
+        meta = self.load_page_meta()
+        meta[self.url] = {
+            'output': output_file.name,
+            'filename': self.filename,
+            'download_images': self.download_images,
+            **cache_validators(response),
+        }
+        with open(self.meta_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    def same_options(self, page_meta):
+        """上次转换时指定的文件名和是否下载图片是否与本次相同"""
+        return (page_meta.get('filename') == self.filename
+                and page_meta.get('download_images') == self.download_images)
+
+    def save_image_meta(self):
+        """把本次下载记录的图片ETag/Last-Modified一次写入磁盘，没有变化时不写"""
+        with self._image_meta_lock:
+            if not self._image_meta_changed:
+                return
+            with open(self.image_meta_file, 'w', encoding='utf-8') as f:
+                json.dump(self.image_meta, f, ensure_ascii=False, indent=2)
+            self._image_meta_changed = False
+
+    def resolve_image_url(self, img_url):
+        """解析图片的绝对URL，并去掉不会发送给服务器的片段（如微信的#imgIndex=1）"""
+        return urldefrag(cached_urljoin(self.url, img_url)).url
 
     def download_image(self, img_url, img_name=None):
         """下载图片并返回本地路径"""
         try:
             # 处理相对URL
-            img_url = urljoin(self.url, img_url)
-
-            # 获取图片
-            response = self.session.get(img_url, timeout=10)
-            response.raise_for_status()
+            img_url = self.resolve_image_url(img_url)
 
             # 生成文件名
             if not img_name:
-                # 从URL生成唯一文件名
+                # 从URL生成唯一文件名（与已有输出目录中的图片同名，重新运行时可直接复用）
                 url_hash = hashlib.md5(img_url.encode()).hexdigest()[:8]
-                ext = os.path.splitext(urlparse(img_url).path)[1] or '.jpg'
+                ext = os.path.splitext(cached_urlparse(img_url).path)[1] or '.jpg'
                 img_name = f"img_{url_hash}{ext}"
-
-            # 保存图片
             img_path = self.images_dir / img_name
-            with open(img_path, 'wb') as f:
-                f.write(response.content)
+            rel_path = f"images/{img_name}"
+
+            # 已下载过的图片直接复用，不再请求网络；强制刷新时用条件请求检查图片是否更新
+            cached_path = self._url_cache.get(img_url)
+            if cached_path == img_path:
+                return rel_path
+            headers = {}
+            if img_path.exists() and img_path.stat().st_size > 0:
+                if not self.force:
+                    self._url_cache[img_url] = img_path
+                    return rel_path
+                with self._image_meta_lock:
+                    headers = conditional_headers(self.image_meta.get(img_name, {}))
+
+            if cached_path and cached_path.exists():
+                # 其他网页已下载过同一图片，直接复制，并沿用其ETag/Last-Modified
+                with open(cached_path, 'rb') as f:
+                    self.write_image(img_path, f)
+                validators = self.source_validators(img_url, cached_path)
+                if validators:
+                    self.record_image_meta(img_name, validators)
+            else:
+                self.fetch_image(img_url, img_path, headers)
+            self._url_cache[img_url] = img_path
 
             # 返回相对路径
-            return f"images/{img_name}"
+            return rel_path
 
         except Exception as e:
-            print(f"下载图片失败 {img_url}: {e}")
+            log(f"下载图片失败 {img_url}: {e}")
             return img_url
 
-    def process_images(self, soup):
-        """处理HTML中的图片，下载并更新路径"""
-        images = soup.find_all('img')
-
-        for img in images:
-            # 检查多个可能的图片属性
+    def fetch_image(self, img_url, img_path, headers):
+        """获取图片并保存，服务器返回304时保留已有文件"""
+        # 分块写入磁盘，不在内存中缓存整张图片
+        with self.session.get(img_url, timeout=10, stream=True, headers=headers) as response:
+            if response.status_code == 304:
+                return
+            response.raise_for_status()
+            response.raw.decode_content = True
+            self.write_image(img_path, response.raw)
+            validators = cache_validators(response)
+
+        self._url_validators[img_url] = validators
+        self.record_image_meta(img_path.name, validators)
+
+    def record_image_meta(self, img_name, validators):
+        """记录图片的ETag/Last-Modified，转换结束后统一写入磁盘"""
+        with self._image_meta_lock:
+            self.image_meta[img_name] = validators
+            self._image_meta_changed = True
+
+    def source_validators(self, img_url, cached_path):
+        """取得其他目录中同一图片的ETag/Last-Modified，没有记录时返回None"""
+        validators = self._url_validators.get(img_url)
+        if validators is None:
+            # 图片是之前的运行下载的，读取所在目录的记录
+            try:
+                with open(cached_path.parent / self.image_meta_file.name, 'r', encoding='utf-8') as f:
+                    validators = json.load(f).get(cached_path.name)
+            except (OSError, ValueError):
+                pass
+        return validators
+
+    def write_image(self, img_path, source):
+        """把文件对象source的内容写入图片文件"""
+        # 先写入临时文件再原子重命名，中断时不会留下不完整的图片
+        tmp_path = img_path.with_name(img_path.name + '.tmp')
+        self.ensure_dir(self.images_dir)
+        try:
+            with open(tmp_path, 'wb') as f:
+                shutil.copyfileobj(source, f, length=COPY_CHUNK_SIZE)
+            os.replace(tmp_path, img_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def process_images(self, soup, img_tags=None):
+        """处理HTML中的图片，并发下载并更新路径"""
+        if img_tags is None:
+            img_tags = soup.find_all('img')
+
+        # 先收集所有图片，检查多个可能的图片属性
+        images = []
+        for img in img_tags:
             src = img.get('src') or img.get('data-src') or img.get('data-actualsrc')
-            if not src:
-                continue
+            if src:
+                images.append((img, self.resolve_image_url(src)))
 
-            # 下载图片
-            local_path = self.download_image(src)
+        # 并发下载图片，同一地址只下载一次；只有一张图片时无需启动线程池
+        srcs = list(dict.fromkeys(src for _, src in images))
+        if len(srcs) <= 1:
+            local_paths = {src: self.download_image(src) for src in srcs}
+        else:
+            with ThreadPoolExecutor(max_workers=self.image_workers) as executor:
+                local_paths = dict(zip(srcs, executor.map(self.download_image, srcs)))
+
+        for img, src in images:
+            local_path = local_paths[src]
 
             # 更新图片路径
             img['src'] = local_path
@@ -92,68 +339,120 @@ class WebpageToMarkdown:
 
         return soup
 
-    def clean_html(self, soup):
+    def _scan_dom(self, root):
+        """一次遍历DOM，返回(图片标签列表, 需要移除的节点列表)"""
+        img_tags = []
+        removable = []
+        for node in root.descendants:
+            if isinstance(node, Comment) or node.name in REMOVABLE_TAGS:
+                removable.append(node)
+            elif node.name == 'img':
+                img_tags.append(node)
+        return img_tags, removable
+
+    def clean_html(self, soup, removable=None):
         """清理HTML，移除不需要的元素"""
-        # 移除script和style标签
-        for tag in soup(['script', 'style', 'meta', 'link']):
-            tag.decompose()
-
-        # 移除注释
-        for comment in soup.find_all(text=lambda text: isinstance(text, str) and '<!--' in text):
-            comment.extract()
+        # script、style等标签的内容是纯文本或为空，不会互相嵌套
+        if removable is None:
+            _, removable = self._scan_dom(soup)
+        for node in removable:
+            if isinstance(node, Comment):
+                node.extract()
+            else:
+                node.decompose()
 
         return soup
 
+    def find_main_content(self, html_text):
+        """解析HTML，返回(soup, 主要内容区域)"""
+        # 微信文章只解析文章各部分，解析结果整体作为主要内容；找不到时回退到完整解析
+        if 'js_content' in html_text:
+            soup = BeautifulSoup(html_text, HTML_PARSER, parse_only=WECHAT_CONTENT)
+            if soup.contents:
+                return soup, soup
+
+        soup = BeautifulSoup(html_text, HTML_PARSER)
+        # 按优先级查找主要内容区域，没有找到时使用body
+        for selector in MAIN_SELECTORS:
+            main_content = soup.select_one(selector)
+            if main_content:
+                return soup, main_content
+        return soup, soup.find('body') or soup
+
+    def extract_title(self, html_text, soup):
+        """获取标题，微信文章的<title>为空时依次使用og:title和文章中的标题"""
+        # 直接从源码提取，解析时无需保留title节点
+        title_match = TITLE_RE.search(html_text)
+        title_text = unescape(title_match.group(1)).strip() if title_match else ""
+        if not title_text:
+            og_title_match = OG_TITLE_RE.search(html_text)
+            if og_title_match:
+                title_text = unescape(og_title_match.group(1)).strip()
+        if not title_text:
+            heading = soup.find(id='activity-name')
+            if heading:
+                title_text = heading.get_text(strip=True)
+        if not title_text and not title_match:
+            title_text = "webpage"
+        return title_text
+
     def convert_to_markdown(self):
         """将网页转换为Markdown"""
-        print(f"正在获取网页: {self.url}")
+        # 之前用相同选项转换过的网页直接跳过；选项不同时重新转换
+        page_meta = self.load_page_meta().get(self.url, {})
+        existing_file = None
+        if (page_meta.get('output') and self.same_options(page_meta)
+                and (self.output_dir / page_meta['output']).exists()):
+            existing_file = self.output_dir / page_meta['output']
+            if not self.force:
+                log(f"已转换过，跳过: {existing_file}")
+                return existing_file
+
+        log(f"正在获取网页: {self.url}")
 
         try:
-            # 获取网页内容
-            response = self.session.get(self.url, timeout=30)
+            # 获取网页内容，强制刷新时用条件请求检查网页是否更新
+            headers = conditional_headers(page_meta) if existing_file else {}
+            response = self.session.get(self.url, timeout=30, headers=headers)
+            if response.status_code == 304:
+                log(f"网页未修改，跳过: {existing_file}")
+                return existing_file
             response.raise_for_status()
 
-            # 强制使用UTF-8编码
-            response.encoding = 'utf-8'
+            # 强制按UTF-8解码原始字节，跳过requests的编码探测
+            html_text = response.content.decode('utf-8', errors='replace')
 
-            # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # 解析HTML并获取主要内容和标题
+            soup, main_content = self.find_main_content(html_text)
+            title_text = self.extract_title(html_text, soup)
 
-            # 获取标题
-            title = soup.find('title')
-            title_text = title.text.strip() if title else "webpage"
+            # 一次遍历主要内容区域，找出图片和需要移除的节点
+            img_tags, removable = self._scan_dom(main_content)
 
             # 清理HTML
-            soup = self.clean_html(soup)
+            main_content = self.clean_html(main_content, removable)
 
             # 处理图片
-            print("正在下载图片...")
-            soup = self.process_images(soup)
-
-            # 获取主要内容
-            # 尝试找到主要内容区域
-            main_content = None
-            for selector in ['main', 'article', '[role="main"]', '.content', '#content', '.post', '.entry-content']:
-                main_content = soup.select_one(selector)
-                if main_content:
-                    break
-
-            # 如果没有找到特定内容区域，使用body
-            if not main_content:
-                main_content = soup.find('body') or soup
+            if self.download_images:
+                log("正在下载图片...")
+                main_content = self.process_images(main_content, img_tags)
+                self.save_image_meta()
 
             # 转换为Markdown
-            print("正在转换为Markdown...")
-            markdown_content = self.h.handle(str(main_content))
+            # 图片地址是在DOM上改写的（微信懒加载图片只有data-src，html2text只认src），
+            # 因此只能把正文子树序列化一次再交给html2text，无法直接截取原始HTML
+            log("正在转换为Markdown...")
+            markdown_content = self.h.handle(main_content.decode())
 
             # 后处理Markdown内容
             markdown_content = self.post_process_markdown(markdown_content)
 
             # 添加元信息
+            timestamp = self.timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
             metadata = f"""---
 title: {title_text}
 source: {self.url}
-date: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+date: {timestamp}
 ---
 
 """
@@ -165,40 +464,71 @@ date: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             if self.filename:
                 safe_title = self.filename
             else:
-                safe_title = re.sub(r'[<>:"/\\|?*]', '_', title_text)[:50]
+                safe_title = title_text.translate(FILENAME_TRANS)[:50]
                 if not safe_title.strip():
-                    safe_title = f"webpage_{hash(self.url) % 10000}"
+                    # 用确定性的哈希生成文件名，每次运行结果相同（内置hash()按进程随机化）
+                    url_hash = int(hashlib.blake2b(self.url.encode(), digest_size=2).hexdigest(), 16)
+                    safe_title = f"webpage_{url_hash}"
             output_file = self.output_dir / f"{safe_title}.md"
 
-            # 保存Markdown文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(final_content)
+            # 保存Markdown文件（一次编码为UTF-8后以二进制写入，不做换行符转换）
+            output_file.write_bytes(final_content.encode('utf-8'))
+            self.save_page_meta(response, output_file)
 
-            print(f"转换完成！文件保存在: {output_file}")
-            print(f"图片保存在: {self.images_dir}")
+            log(f"转换完成！文件保存在: {output_file}")
+            if self.download_images:
+                log(f"图片保存在: {self.images_dir}")
 
             return output_file
 
         except Exception as e:
-            print(f"转换失败: {e}")
+            log(f"转换失败: {e}")
             raise
 
     def post_process_markdown(self, content):
         """后处理Markdown内容"""
-        # 修复多余的空行
-        content = re.sub(r'\n{3,}', '\n\n', content)
-
-        # 修复图片链接格式
-        content = re.sub(r'!\[([^\]]*)\]\(([^)]+)\)', r'![\1](\2)', content)
-
-        # 确保标题前后有空行
-        content = re.sub(r'(\n)?(\#{1,6}\s+[^\n]+)(\n)?', r'\n\n\2\n\n', content)
+        # 一次扫描完成：确保标题前后有空行，并修复多余的空行
+        content = POST_PROCESS_RE.sub(self._fix_blank_lines, content)
 
         # 清理开头和结尾的空白
         content = content.strip()
 
         return content
 
+    @staticmethod
+    def _fix_blank_lines(match):
+        """POST_PROCESS_RE的替换回调"""
+        heading = match.group(1)
+        if not heading:
+            return '\n\n'
+        # 紧接上一个标题的标题：中间的换行已被上一个标题匹配，并在其后补了空行
+        start = match.start()
+        if start and match.start(1) == start and match.string[start - 1] == '\n':
+            return f'{heading}\n\n'
+        return f'\n\n{heading}\n\n'
+
+
+def convert_all(urls, outputs, max_workers=BATCH_WORKERS, **kwargs):
+    """并发转换一批网页，输出目录和文件名均使用outputs中对应的名称，返回转换失败的URL列表"""
+    # 同一输出目录的网页按原顺序串行转换，避免并发写同一文件
+    batches = {}
+    for url, output in zip(urls, outputs):
+        batches.setdefault(output, []).append(url)
+
+    def convert_batch(item):
+        output, batch_urls = item
+        failed = []
+        for url in batch_urls:
+            # 单个网页失败不影响其他网页，错误信息已由convert_to_markdown输出
+            try:
+                WebpageToMarkdown(url, output, output, **kwargs).convert_to_markdown()
+            except Exception:
+                failed.append(url)
+        return failed
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return [url for failed in executor.map(convert_batch, batches.items()) for url in failed]
+
 
 def main():
     parser = argparse.ArgumentParser(description='将网页转换为Markdown格式')
@@ -206,6 +536,7 @@ def main():
     parser.add_argument('-o', '--output', default='output', help='输出目录（默认: output）')
     parser.add_argument('-f', '--filename', help='输出文件名（不含扩展名，默认使用网页标题）')
     parser.add_argument('--no-images', action='store_true', help='不下载图片')
+    parser.add_argument('--force', action='store_true', help='已转换过的网页也重新检查是否更新；网页有更新时，已下载的图片也重新检查（网页未修改时不检查图片）')
 
     args = parser.parse_args()
 
@@ -214,11 +545,8 @@ def main():
         args.url = 'https://' + args.url
 
     try:
-        converter = WebpageToMarkdown(args.url, args.output, args.filename)
-
-        if args.no_images:
-            converter.h.ignore_images = True
-
+        converter = WebpageToMarkdown(args.url, args.output, args.filename,
+                                      download_images=not args.no_images, force=args.force)
         converter.convert_to_markdown()
 
     except KeyboardInterrupt:
@@ -636,8 +964,11 @@ if __name__ == "__main__":
         "小米汽车答网友问(第197集)",
         "小米汽车答网友问(第198集)",
     ]
-    for url, output in zip(url_list, output_lst):
-        WebpageToMarkdown(url, output)
-        converter = WebpageToMarkdown(url, output, output)
-
-        converter.convert_to_markdown()
+    # 整批转换共用同一个时间戳
+    run_timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+
+    failed_urls = convert_all(url_list, output_lst, timestamp=run_timestamp)
+    if failed_urls:
+        print(f"以下 {len(failed_urls)} 个网页转换失败:")
+        for url in failed_urls:
+            print(url)
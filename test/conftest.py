@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 脚本不是安装包，测试时从Scripts目录直接导入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'Scripts'))
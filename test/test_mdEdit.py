@@ -0,0 +1,63 @@
+import re
+
+import pytest
+
+from mdEdit import combine_rules, replace_in_md
+
+
+def compile_rules(replacements):
+    return [(re.compile(pattern, re.MULTILINE | re.DOTALL), replacement) for pattern, replacement in replacements]
+
+
+def run_replace(tmp_path, content, replacements, **kwargs):
+    input_file = tmp_path / 'input.md'
+    output_file = tmp_path / 'output.md'
+    input_file.write_text(content, encoding='utf-8')
+    replace_in_md(str(input_file), str(output_file), replacements, **kwargs)
+    return output_file.read_bytes().decode('utf-8')
+
+
+def test_combine_rules_expands_replacement_escapes():
+    combined = combine_rules(compile_rules([(r'foo', r'X\n'), (r'bar', r'\tY')]))
+
+    assert combined is not None
+    regex, literals = combined
+    assert literals == ['X\n', '\tY']
+    assert regex.sub(lambda m: literals[int(m.lastgroup[1:])], 'foo bar') == 'X\n \tY'
+
+
+@pytest.mark.parametrize('replacements', [
+    [(r'foo', 'X')],                          # 只有一条规则
+    [(r'(foo)', 'X'), (r'bar', 'Y')],         # 规则含分组
+    [(r'foo', r'\g<0>X'), (r'bar', 'Y')],     # 替换字符串引用分组
+    [(r'foo', 'X'), (r'(?i)bar', 'Y')],       # 内联标志会影响所有规则
+    [(r'foo', 'X'), (r'bar(?-s:.)', 'Y')],    # 局部内联标志
+])
+def test_combine_rules_refuses_unsafe_rules(replacements):
+    assert combine_rules(compile_rules(replacements)) is None
+
+
+def test_replace_in_md_applies_rules_in_order_by_default(tmp_path):
+    # 逐条替换：后面的规则能看到前面规则的替换结果
+    assert run_replace(tmp_path, 'ab', [(r'b', 'Y'), (r'ab', 'X')]) == 'aY'
+    assert run_replace(tmp_path, 'foo', [(r'foo', 'bar'), (r'bar', 'baz')]) == 'baz'
+
+
+def test_replace_in_md_single_pass_matches_original_text(tmp_path):
+    replacements = [(r'foo', 'bar'), (r'bar', 'baz')]
+
+    assert run_replace(tmp_path, 'foo bar', replacements, single_pass=True) == 'bar baz'
+
+
+def test_replace_in_md_single_pass_falls_back_for_inline_flags(tmp_path):
+    replacements = [(r'foo', 'X'), (r'(?i)bar', 'Y')]
+
+    assert run_replace(tmp_path, 'FOO foo BAR', replacements, single_pass=True) == 'FOO X Y'
+
+
+def test_replace_in_md_single_pass_matches_sequential_for_independent_rules(tmp_path):
+    content = '# 标题\r\n正文 **粗体** 结尾\n'
+    replacements = [(r'\*\*', '__'), (r'\r\n\#', r'\r\n\#\#\#'), (r'^#', '##')]
+
+    assert (run_replace(tmp_path, content, replacements, single_pass=True)
+            == run_replace(tmp_path, content, replacements))
@@ -0,0 +1,263 @@
+import hashlib
+import io
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+import url2md
+from url2md import WebpageToMarkdown
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+ARTICLE_URL = 'https://mp.weixin.qq.com/s/test'
+
+
+class FakeResponse:
+    """模拟requests的响应，支持流式读取和with语句"""
+
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.raw = io.BytesIO(content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise url2md.requests.HTTPError(f"{self.status_code} Error")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    """按URL返回预设内容的会话，记录所有请求"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append((url, kwargs.get('headers') or {}))
+        if url not in self.pages:
+            return FakeResponse(b'', status_code=404)
+        return FakeResponse(self.pages[url])
+
+
+@pytest.fixture(autouse=True)
+def new_run(monkeypatch):
+    """每个测试使用新的图片缓存和目录记录，避免类属性在测试之间泄漏；测试中调用可模拟新的一次运行"""
+    def reset():
+        monkeypatch.setattr(WebpageToMarkdown, '_url_cache', {})
+        monkeypatch.setattr(WebpageToMarkdown, '_url_validators', {})
+        monkeypatch.setattr(WebpageToMarkdown, '_dirs_created', set())
+
+    reset()
+    return reset
+
+
+@pytest.fixture
+def wechat_session():
+    return FakeSession({
+        ARTICLE_URL: (FIXTURES / 'wechat_article.html').read_bytes(),
+        'https://mmbiz.qpic.cn/cover.jpg': b'cover',
+        'https://mmbiz.qpic.cn/body.png': b'body',
+    })
+
+
+def convert(session, output_dir, **kwargs):
+    converter = WebpageToMarkdown(ARTICLE_URL, output_dir, session=session, timestamp='2025-01-01 00:00:00', **kwargs)
+    return converter.convert_to_markdown().read_text(encoding='utf-8')
+
+
+@pytest.mark.parametrize('parser', ['lxml', 'html.parser'])
+def test_wechat_article_keeps_cover_heading_and_author(wechat_session, tmp_path, monkeypatch, parser):
+    monkeypatch.setattr(url2md, 'HTML_PARSER', parser)
+    markdown = convert(wechat_session, tmp_path, filename='article')
+
+    assert 'title: 关于大家关心问题的回答' in markdown
+    assert re.search(r'^#\s+关于大家关心问题的回答', markdown, re.MULTILINE)
+    assert '[小米汽车]' in markdown
+    assert '![cover_image](images/img_' in markdown
+    assert ('https://mmbiz.qpic.cn/cover.jpg', {}) in wechat_session.requests
+    assert '### 小米SU7 Ultra「排位模式」功能到底有没有解锁条件？' in markdown
+    assert '之前我们推送的更新版本中「排位模式」功能添加了解锁条件。' in markdown
+    # 正文之外的页面元素、脚本和注释都不应出现
+    assert '顶部广告' not in markdown
+    assert '微信扫一扫' not in markdown
+    assert '正文脚本' not in markdown
+    assert '编辑器注释' not in markdown
+
+
+def test_wechat_title_names_output_file(wechat_session, tmp_path):
+    convert(wechat_session, tmp_path, download_images=False)
+
+    assert (tmp_path / '关于大家关心问题的回答.md').exists()
+
+
+def test_wechat_article_without_strainer_match_falls_back_to_full_parse(tmp_path):
+    html = '<html><head><title>普通网页</title></head><body><nav>导航</nav><article><p>正文</p></article></body></html>'
+    session = FakeSession({ARTICLE_URL: html.encode('utf-8')})
+
+    markdown = convert(session, tmp_path, download_images=False)
+
+    assert 'title: 普通网页' in markdown
+    assert '正文' in markdown
+    assert '导航' not in markdown
+
+
+@pytest.mark.parametrize('content, expected', [
+    ('段落\n\n\n\n段落', '段落\n\n段落'),
+    ('段落\n## 标题\n段落', '段落\n\n## 标题\n\n段落'),
+    ('段落\n\n\n\n### 标题\n\n\n\n段落', '段落\n\n### 标题\n\n段落'),
+    # 井号后的换行不算标题，换行串照常合并
+    ('#\n\n\n\nfoo', '#\n\nfoo'),
+    # 相邻的标题之间只保留一个空行
+    ('##   \n\n## 标题\n段落', '##   \n\n## 标题\n\n段落'),
+    ('# 一\n# 二\n# 三', '# 一\n\n# 二\n\n# 三'),
+    ('\n\n# 标题\n\n', '# 标题'),
+])
+def test_post_process_markdown(tmp_path, content, expected):
+    converter = WebpageToMarkdown(ARTICLE_URL, tmp_path)
+
+    assert converter.post_process_markdown(content) == expected
+
+
+def test_download_image_reuses_existing_md5_named_file(tmp_path):
+    img_url = 'https://mmbiz.qpic.cn/existing.png'
+    img_name = f"img_{hashlib.md5(img_url.encode()).hexdigest()[:8]}.png"
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'images' / img_name).write_bytes(b'old')
+    session = FakeSession({img_url: b'new'})
+
+    local_path = WebpageToMarkdown(ARTICLE_URL, tmp_path, session=session).download_image(img_url)
+
+    assert local_path == f'images/{img_name}'
+    assert session.requests == []
+    assert (tmp_path / 'images' / img_name).read_bytes() == b'old'
+
+
+class RevalidatingSession(FakeSession):
+    """带ETag的图片服务器：请求头中的ETag与当前一致时返回304"""
+
+    def __init__(self, content, etag):
+        super().__init__({})
+        self.content = content
+        self.etag = etag
+
+    def get(self, url, **kwargs):
+        headers = kwargs.get('headers') or {}
+        self.requests.append((url, headers))
+        if headers.get('If-None-Match') == self.etag:
+            return FakeResponse(b'', status_code=304)
+        return FakeResponse(self.content, headers={'ETag': self.etag})
+
+
+def test_force_revalidates_existing_image(tmp_path, new_run):
+    img_url = 'https://mmbiz.qpic.cn/revalidate.png'
+    session = RevalidatingSession(b'v1', '"v1"')
+
+    converter = WebpageToMarkdown(ARTICLE_URL, tmp_path, session=session, force=True)
+    local_path = converter.download_image(img_url)
+    converter.save_image_meta()
+    img_path = tmp_path / local_path
+
+    assert img_path.read_bytes() == b'v1'
+    assert json.loads((tmp_path / 'images' / '.etags.json').read_text(encoding='utf-8')) == {
+        img_path.name: {'etag': '"v1"', 'last_modified': None},
+    }
+
+    # 未修改：发送条件请求，收到304后保留原文件
+    new_run()
+    WebpageToMarkdown(ARTICLE_URL, tmp_path, session=session, force=True).download_image(img_url)
+    assert session.requests[-1] == (img_url, {'If-None-Match': '"v1"'})
+    assert img_path.read_bytes() == b'v1'
+
+    # 已修改：重新下载并替换原文件
+    new_run()
+    session.content, session.etag = b'v2', '"v2"'
+    WebpageToMarkdown(ARTICLE_URL, tmp_path, session=session, force=True).download_image(img_url)
+    assert img_path.read_bytes() == b'v2'
+
+
+def test_existing_image_is_not_requested_without_force(tmp_path, new_run):
+    img_url = 'https://mmbiz.qpic.cn/no-force.png'
+    session = RevalidatingSession(b'v1', '"v1"')
+    WebpageToMarkdown(ARTICLE_URL, tmp_path, session=session).download_image(img_url)
+    new_run()
+
+    WebpageToMarkdown(ARTICLE_URL, tmp_path, session=session).download_image(img_url)
+
+    assert len(session.requests) == 1
+
+
+PLAIN_PAGE = '<html><head><title>普通网页</title></head><body><article><p>正文</p></article></body></html>'.encode('utf-8')
+
+
+def convert_page(session, output_dir, timestamp='2025-01-01 00:00:00', **kwargs):
+    return WebpageToMarkdown(ARTICLE_URL, output_dir, session=session, timestamp=timestamp,
+                             **kwargs).convert_to_markdown()
+
+
+def test_converted_page_is_skipped_without_force(tmp_path):
+    session = RevalidatingSession(PLAIN_PAGE, '"p1"')
+    first = convert_page(session, tmp_path, filename='page')
+
+    assert convert_page(session, tmp_path, filename='page') == first
+    assert len(session.requests) == 1
+
+
+def test_force_keeps_unmodified_page(tmp_path):
+    session = RevalidatingSession(PLAIN_PAGE, '"p1"')
+    first = convert_page(session, tmp_path, filename='page')
+    content = first.read_text(encoding='utf-8')
+
+    assert convert_page(session, tmp_path, timestamp='2025-02-02 00:00:00', filename='page', force=True) == first
+    assert session.requests[-1] == (ARTICLE_URL, {'If-None-Match': '"p1"'})
+    assert first.read_text(encoding='utf-8') == content
+
+
+@pytest.mark.parametrize('force', [False, True])
+@pytest.mark.parametrize('options', [
+    {'filename': 'second', 'download_images': False},
+    {'filename': 'first', 'download_images': True},
+])
+def test_page_is_reconverted_when_options_change(tmp_path, force, options):
+    session = RevalidatingSession(PLAIN_PAGE, '"p1"')
+    convert_page(session, tmp_path, filename='first', download_images=False)
+
+    output = convert_page(session, tmp_path, timestamp='2025-02-02 00:00:00', force=force, **options)
+
+    assert output == tmp_path / f"{options['filename']}.md"
+    assert 'date: 2025-02-02 00:00:00' in output.read_text(encoding='utf-8')
+    # 选项不同时直接完整获取，不发送条件请求
+    assert session.requests[-1] == (ARTICLE_URL, {})
+    page_meta = json.loads((tmp_path / '.meta.json').read_text(encoding='utf-8'))[ARTICLE_URL]
+    assert page_meta['filename'] == options['filename']
+    assert page_meta['download_images'] == options['download_images']
+
+
+@pytest.mark.parametrize('source_from_earlier_run', [False, True])
+def test_copied_image_keeps_validators(tmp_path, new_run, source_from_earlier_run):
+    img_url = 'https://mmbiz.qpic.cn/shared.png'
+    session = RevalidatingSession(b'v1', '"v1"')
+    first = WebpageToMarkdown(ARTICLE_URL, tmp_path / 'first', session=session)
+    local_path = first.download_image(img_url)
+    first.save_image_meta()
+    if source_from_earlier_run:
+        # 新的运行中，第一个目录的图片不请求网络直接复用，再复制到第二个目录
+        new_run()
+        WebpageToMarkdown(ARTICLE_URL, tmp_path / 'first', session=session).download_image(img_url)
+
+    second = WebpageToMarkdown(ARTICLE_URL, tmp_path / 'second', session=session)
+    assert second.download_image(img_url) == local_path
+    second.save_image_meta()
+    assert len(session.requests) == 1
+
+    # 之后强制刷新第二个目录时发送条件请求
+    new_run()
+    WebpageToMarkdown(ARTICLE_URL, tmp_path / 'second', session=session, force=True).download_image(img_url)
+    assert session.requests[-1] == (img_url, {'If-None-Match': '"v1"'})